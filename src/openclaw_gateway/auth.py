@@ -10,6 +10,6 @@ from .config import settings
 def verify_token(token: str) -> bool:
     """Constant-time comparison of the provided token against the configured one."""
     expected = settings.auth_token
-    if not expected:
+    if not expected or not isinstance(token, str):
         return False
-    return hmac.compare_digest(token, expected)
+    return hmac.compare_digest(token.encode(), expected.encode())
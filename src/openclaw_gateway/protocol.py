@@ -4,19 +4,25 @@ Frame types:
   - req:   Client request  {"type": "req", "id": "...", "method": "...", "params": {...}}
   - res:   Server response {"type": "res", "id": "...", "ok": true, "payload": {...}}
   - event: Server event    {"type": "event", "event": "...", "payload": {...}}
+
+Frames are serialized with orjson and sent as WebSocket text frames, which is
+what v3 clients expect; helpers return the decoded ``str`` so the server can
+pass it straight to ``send_text`` without re-encoding through ``json``.
 """
 
 from __future__ import annotations
 
-import json
+import base64
 import uuid
 from typing import Any
 
+import orjson
+
 
 def make_response(req_id: str, payload: dict[str, Any], ok: bool = True) -> str:
     """Create a response frame for a request."""
     frame: dict[str, Any] = {"type": "res", "id": req_id, "ok": ok, "payload": payload}
-    return json.dumps(frame)
+    return orjson.dumps(frame).decode()
 
 
 def make_error(req_id: str, code: str, message: str) -> str:
@@ -27,45 +33,50 @@ def make_error(req_id: str, code: str, message: str) -> str:
         "ok": False,
         "error": {"code": code, "message": message},
     }
-    return json.dumps(frame)
+    return orjson.dumps(frame).decode()
 
 
 def make_event(event: str, payload: dict[str, Any]) -> str:
     """Create an event frame to push to the client."""
     frame = {"type": "event", "event": event, "payload": payload}
-    return json.dumps(frame)
+    return orjson.dumps(frame).decode()
+
+
+# Constant frames, serialized once at import
+CHALLENGE_FRAME = make_event(
+    "connect.challenge",
+    {
+        "type": "connect_challenge",
+        "protocols": [3],
+        "server": {"id": "openclaw-gateway", "version": "0.1.0"},
+    },
+)
+TICK_FRAME = make_event("tick", {})
 
 
 def make_challenge() -> str:
     """Create the initial connect.challenge event."""
-    return make_event(
-        "connect.challenge",
-        {
-            "type": "connect_challenge",
-            "protocols": [3],
-            "server": {"id": "openclaw-gateway", "version": "0.1.0"},
-        },
-    )
+    return CHALLENGE_FRAME
 
 
 def make_hello_ok(req_id: str) -> str:
     """Create the hello-ok response after successful auth."""
     return make_response(
         req_id,
-        {"type": "hello-ok", "protocol": 3, "session": str(uuid.uuid4())},
+        {"type": "hello-ok", "protocol": 3, "session": uuid.uuid4().hex},
     )
 
 
 def make_tick() -> str:
     """Create a heartbeat tick event."""
-    return make_event("tick", {})
+    return TICK_FRAME
 
 
 def parse_frame(text: str) -> dict[str, Any] | None:
     """Parse a JSON frame from the client. Returns None on parse failure."""
     try:
-        return json.loads(text)
-    except (json.JSONDecodeError, TypeError):
+        return orjson.loads(text)
+    except (orjson.JSONDecodeError, TypeError):
         return None
 
 
@@ -74,16 +85,19 @@ def make_chat_event(
     text: str,
     state: str = "delta",
     is_final: bool = False,
+    offset: int = 0,
 ) -> str:
-    """Create a chat streaming event."""
-    payload: dict[str, Any] = {
-        "runId": run_id,
-        "state": state,
-        "text": text,
-    }
+    """Create a chat streaming event.
+
+    Delta events carry only the new ``text`` and its character ``offset`` into
+    the reply; the final event carries the full reply text.
+    """
     if is_final:
-        payload["state"] = "final"
-    return make_event("chat", payload)
+        return make_event("chat", {"runId": run_id, "state": "final", "text": text})
+    return make_event(
+        "chat",
+        {"runId": run_id, "state": state, "delta": text, "offset": offset},
+    )
 
 
 def make_agent_lifecycle(run_id: str, phase: str) -> str:
@@ -92,3 +106,27 @@ def make_agent_lifecycle(run_id: str, phase: str) -> str:
         "agent",
         {"runId": run_id, "stream": "lifecycle", "data": {"phase": phase}},
     )
+
+
+def make_audio_header(run_id: str, size: int, mime: str, text: str, chunks: int) -> str:
+    """Create the audio_broadcast_start event announcing a chunked TTS payload.
+
+    This replaces the old single ``audio_broadcast`` event, so clients that only
+    know that event ignore the new stream instead of misreading it.
+    """
+    return make_event(
+        "audio_broadcast_start",
+        {"runId": run_id, "size": size, "mime": mime, "chunks": chunks, "text": text},
+    )
+
+
+def make_audio_chunk(run_id: str, index: int, audio: bytes) -> str:
+    """Create one base64-encoded audio_broadcast_chunk event."""
+    return make_event(
+        "audio_broadcast_chunk",
+        {
+            "runId": run_id,
+            "index": index,
+            "audio_base64": base64.b64encode(audio).decode("ascii"),
+        },
+    )
@@ -5,13 +5,55 @@ Supports OpenAI Whisper API and compatible endpoints.
 
 from __future__ import annotations
 
+import functools
+import secrets
+from collections.abc import AsyncIterable, AsyncIterator
+
 import httpx
 
 from ..config import settings
 
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@functools.lru_cache(maxsize=4)
+def _headers(api_key: str) -> tuple[tuple[str, str], ...]:
+    """Headers for a Whisper-compatible endpoint, built once per key."""
+    if api_key:
+        return (("Authorization", f"Bearer {api_key}"),)
+    return ()
 
-async def transcribe(audio_data: bytes, filename: str = "audio.wav") -> str | None:
-    """Transcribe audio to text. Returns transcription or None if disabled."""
+
+async def transcribe(
+    audio_stream: AsyncIterable[bytes],
+    filename: str = "audio.wav",
+    size: int | None = None,
+) -> str | None:
+    """Transcribe audio to text. Returns transcription or None if disabled.
+
+    The audio chunks are forwarded as they arrive while the request body is sent.
+    Pass the audio ``size`` in bytes when known so the request carries a
+    Content-Length; without it the body is sent chunked.
+    """
     provider = settings.asr_provider
 
     if provider == "disabled":
@@ -19,40 +61,72 @@ async def transcribe(audio_data: bytes, filename: str = "audio.wav") -> str | No
 
     if provider == "auto":
         if settings.asr_base_url:
-            return await _whisper_api(settings.asr_base_url, audio_data, filename)
+            return await _whisper_api(settings.asr_base_url, audio_stream, filename, size)
         if settings.asr_api_key:
-            return await _whisper_api("https://api.openai.com/v1", audio_data, filename)
+            return await _whisper_api("https://api.openai.com/v1", audio_stream, filename, size)
         return None
 
     if provider in ("openai", "whisper"):
         base_url = settings.asr_base_url or "https://api.openai.com/v1"
-        return await _whisper_api(base_url, audio_data, filename)
+        return await _whisper_api(base_url, audio_stream, filename, size)
 
     return None
 
 
 async def _whisper_api(
     base_url: str,
-    audio_data: bytes,
+    audio_stream: AsyncIterable[bytes],
     filename: str,
+    size: int | None = None,
 ) -> str | None:
     """Call the Whisper-compatible transcription endpoint."""
-    headers: dict[str, str] = {}
-    if settings.asr_api_key:
-        headers["Authorization"] = f"Bearer {settings.asr_api_key}"
+    boundary = secrets.token_hex(16)
+    head, tail = _multipart_frame(boundary.encode(), filename)
+    headers = [
+        *_headers(settings.asr_api_key),
+        ("Content-Type", f"multipart/form-data; boundary={boundary}"),
+    ]
+    if size is not None:
+        headers.append(("Content-Length", str(len(head) + size + len(tail))))
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(
-                f"{base_url}/audio/transcriptions",
-                headers=headers,
-                files={"file": (filename, audio_data, "audio/wav")},
-                data={"model": "whisper-1"},
-            )
-            if resp.status_code == 200:
-                result = resp.json()
-                return result.get("text", "")
+        resp = await get_client().post(
+            f"{base_url}/audio/transcriptions",
+            headers=headers,
+            content=_multipart_body(head, audio_stream, tail),
+        )
+        if resp.status_code == 200:
+            result = resp.json()
+            return result.get("text", "")
     except (httpx.ConnectError, httpx.TimeoutException):
         pass
 
     return None
+
+
+def _multipart_frame(boundary: bytes, filename: str) -> tuple[bytes, bytes]:
+    """Build the transcription form around the audio part, as (head, tail)."""
+    # Escape like httpx's multipart encoder, and drop line breaks from the header
+    quoted = filename.replace("\\", "\\\\").replace('"', "%22")
+    quoted = quoted.replace("\r", "").replace("\n", "").encode()
+    head = (
+        b"--" + boundary + b"\r\n"
+        b'Content-Disposition: form-data; name="model"\r\n\r\n'
+        b"whisper-1\r\n"
+        b"--" + boundary + b"\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="' + quoted + b'"\r\n'
+        b"Content-Type: audio/wav\r\n\r\n"
+    )
+    return head, b"\r\n--" + boundary + b"--\r\n"
+
+
+async def _multipart_body(
+    head: bytes,
+    audio_stream: AsyncIterable[bytes],
+    tail: bytes,
+) -> AsyncIterator[bytes]:
+    """Stream the transcription form, forwarding the audio part chunk by chunk."""
+    yield head
+    async for chunk in audio_stream:
+        yield chunk
+    yield tail
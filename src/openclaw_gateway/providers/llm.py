@@ -7,25 +7,80 @@ and Anthropic's Claude API.
 from __future__ import annotations
 
 import asyncio
+import functools
+import time
 from collections.abc import AsyncIterator
 from typing import Any
 
 import httpx
+import orjson
 
 from ..config import settings
 
+# Seconds an auto-detection result is reused before probing again
+DETECT_TTL = 60.0
+
+_client: httpx.AsyncClient | None = None
+_detect_cache: tuple[float, tuple[str, str, str]] | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=60.0,
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@functools.lru_cache(maxsize=4)
+def _headers(api_key: str) -> tuple[tuple[str, str], ...]:
+    """Headers for an OpenAI-compatible endpoint, built once per key."""
+    if api_key:
+        return (("Content-Type", "application/json"), ("Authorization", f"Bearer {api_key}"))
+    return (("Content-Type", "application/json"),)
+
+
+@functools.lru_cache(maxsize=4)
+def _anthropic_headers(api_key: str) -> tuple[tuple[str, str], ...]:
+    """Headers for the Anthropic API, built once per key."""
+    return (
+        ("Content-Type", "application/json"),
+        ("x-api-key", api_key),
+        ("anthropic-version", "2023-06-01"),
+    )
+
 
 async def _detect_provider() -> tuple[str, str, str]:
-    """Auto-detect available LLM. Returns (provider, base_url, model)."""
+    """Auto-detect available LLM, reusing the last result for DETECT_TTL seconds."""
+    global _detect_cache
+    if _detect_cache is not None and time.monotonic() - _detect_cache[0] < DETECT_TTL:
+        return _detect_cache[1]
+    result = await _probe_provider()
+    _detect_cache = (time.monotonic(), result)
+    return result
+
+
+async def _probe_provider() -> tuple[str, str, str]:
+    """Probe for an available LLM. Returns (provider, base_url, model)."""
     # Try local ollama first
     try:
-        async with httpx.AsyncClient(timeout=2.0) as client:
-            resp = await client.get("http://localhost:11434/api/tags")
-            if resp.status_code == 200:
-                models = resp.json().get("models", [])
-                if models:
-                    model_name = models[0]["name"]
-                    return "ollama", "http://localhost:11434/v1", model_name
+        resp = await get_client().get("http://localhost:11434/api/tags", timeout=2.0)
+        if resp.status_code == 200:
+            models = resp.json().get("models", [])
+            if models:
+                model_name = models[0]["name"]
+                return "ollama", "http://localhost:11434/v1", model_name
     except (httpx.ConnectError, httpx.TimeoutException):
         pass
 
@@ -41,9 +96,15 @@ async def _detect_provider() -> tuple[str, str, str]:
 
 
 async def get_provider_info() -> dict[str, str]:
-    """Return current provider detection info for diagnostics."""
+    """Return current provider detection info for diagnostics.
+
+    Uses the last detection result when there is one, without probing.
+    """
     if settings.llm_provider == "auto":
-        provider, base_url, model = await _detect_provider()
+        if _detect_cache is not None:
+            provider, base_url, model = _detect_cache[1]
+        else:
+            provider, base_url, model = await _detect_provider()
     else:
         provider = settings.llm_provider
         base_url = settings.llm_base_url or "https://api.openai.com/v1"
@@ -51,11 +112,26 @@ async def get_provider_info() -> dict[str, str]:
     return {"provider": provider, "base_url": base_url, "model": model}
 
 
-async def chat_stream(
-    messages: list[dict[str, str]],
-    system: str | None = None,
-) -> AsyncIterator[str]:
-    """Stream chat completion tokens from the configured LLM."""
+async def _sse_data(resp: httpx.Response) -> AsyncIterator[bytes]:
+    """Yield the payload of each ``data: `` line of an SSE response, as raw bytes."""
+    buf = bytearray()
+    async for chunk in resp.aiter_bytes(chunk_size=4096):
+        buf += chunk
+        start = 0
+        while (end := buf.find(b"\n", start)) != -1:
+            if buf.startswith(b"data: ", start, end):
+                yield bytes(buf[start + 6 : end]).rstrip(b"\r")
+            start = end + 1
+        del buf[:start]
+    if buf.startswith(b"data: "):
+        yield bytes(buf[6:]).rstrip(b"\r")
+
+
+async def chat_stream(messages: list[dict[str, str]]) -> AsyncIterator[str]:
+    """Stream chat completion tokens from the configured LLM.
+
+    ``messages`` is the full conversation, including any leading system message.
+    """
     if settings.llm_provider == "auto":
         provider, base_url, model = await _detect_provider()
     else:
@@ -68,10 +144,10 @@ async def chat_stream(
         return
 
     if provider in ("openai", "ollama", "auto"):
-        async for token in _openai_compatible_stream(base_url, model, messages, system):
+        async for token in _openai_compatible_stream(base_url, model, messages):
             yield token
     elif provider == "anthropic":
-        async for token in _anthropic_stream(model, messages, system):
+        async for token in _anthropic_stream(model, messages):
             yield token
     else:
         yield f"Unknown LLM provider: {provider}"
@@ -81,61 +157,65 @@ async def _openai_compatible_stream(
     base_url: str,
     model: str,
     messages: list[dict[str, str]],
-    system: str | None = None,
 ) -> AsyncIterator[str]:
     """Stream from any OpenAI-compatible API (OpenAI, ollama, vLLM, LM Studio)."""
-    api_messages: list[dict[str, str]] = []
-    if system:
-        api_messages.append({"role": "system", "content": system})
-    api_messages.extend(messages)
-
-    headers: dict[str, str] = {"Content-Type": "application/json"}
-    if settings.llm_api_key:
-        headers["Authorization"] = f"Bearer {settings.llm_api_key}"
-
     payload: dict[str, Any] = {
         "model": model,
-        "messages": api_messages,
+        "messages": messages,
         "stream": True,
     }
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        async with client.stream(
-            "POST",
-            f"{base_url}/chat/completions",
-            json=payload,
-            headers=headers,
-        ) as resp:
-            async for line in resp.aiter_lines():
-                if not line.startswith("data: "):
-                    continue
-                data = line[6:]
-                if data == "[DONE]":
-                    return
-                try:
-                    import json
-
-                    chunk = json.loads(data)
-                    delta = chunk["choices"][0].get("delta", {})
-                    content = delta.get("content", "")
-                    if content:
-                        yield content
-                except (KeyError, IndexError, ValueError):
-                    continue
+    async with get_client().stream(
+        "POST",
+        f"{base_url}/chat/completions",
+        json=payload,
+        headers=_headers(settings.llm_api_key),
+    ) as resp:
+        async for data in _sse_data(resp):
+            if data == b"[DONE]":
+                return
+            try:
+                chunk = orjson.loads(data)
+                delta = chunk["choices"][0].get("delta", {})
+                content = delta.get("content", "")
+                if content:
+                    yield content
+            except (KeyError, IndexError, ValueError):
+                continue
 
 
 async def _anthropic_stream(
     model: str,
     messages: list[dict[str, str]],
-    system: str | None = None,
 ) -> AsyncIterator[str]:
     """Stream from Anthropic's Claude API."""
     model = model or "claude-sonnet-4-20250514"
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": settings.llm_api_key,
-        "anthropic-version": "2023-06-01",
-    }
+
+    # Anthropic takes the system prompt as a separate field
+    system = None
+    if messages and messages[0]["role"] == "system":
+        system = messages[0]["content"]
+        messages = messages[1:]
+
+    # Put the cache breakpoint on the newest turn so the whole conversation so
+    # far is cached and the next turn reuses it. Anthropic ignores prefixes
+    # shorter than its minimum (1024 tokens, 2048 on Haiku), so short chats
+    # simply go uncached.
+    if messages:
+        last = messages[-1]
+        messages = [
+            *messages[:-1],
+            {
+                "role": last["role"],
+                "content": [
+                    {
+                        "type": "text",
+                        "text": last["content"],
+                        "cache_control": {"type": "ephemeral"},
+                    }
+                ],
+            },
+        ]
 
     payload: dict[str, Any] = {
         "model": model,
@@ -148,23 +228,18 @@ async def _anthropic_stream(
 
     base_url = settings.llm_base_url or "https://api.anthropic.com"
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        async with client.stream(
-            "POST",
-            f"{base_url}/v1/messages",
-            json=payload,
-            headers=headers,
-        ) as resp:
-            async for line in resp.aiter_lines():
-                if not line.startswith("data: "):
-                    continue
-                try:
-                    import json
-
-                    event = json.loads(line[6:])
-                    if event.get("type") == "content_block_delta":
-                        text = event.get("delta", {}).get("text", "")
-                        if text:
-                            yield text
-                except (ValueError, KeyError):
-                    continue
+    async with get_client().stream(
+        "POST",
+        f"{base_url}/v1/messages",
+        json=payload,
+        headers=_anthropic_headers(settings.llm_api_key),
+    ) as resp:
+        async for data in _sse_data(resp):
+            try:
+                event = orjson.loads(data)
+                if event.get("type") == "content_block_delta":
+                    text = event.get("delta", {}).get("text", "")
+                    if text:
+                        yield text
+            except (ValueError, KeyError):
+                continue
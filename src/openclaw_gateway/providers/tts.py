@@ -5,10 +5,41 @@ Supports OpenAI-compatible TTS APIs (including ScrappyLabs/local setups).
 
 from __future__ import annotations
 
+import functools
+
 import httpx
 
 from ..config import settings
 
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@functools.lru_cache(maxsize=4)
+def _headers(api_key: str) -> tuple[tuple[str, str], ...]:
+    """Headers for an OpenAI-compatible TTS endpoint, built once per key."""
+    if api_key:
+        return (("Content-Type", "application/json"), ("Authorization", f"Bearer {api_key}"))
+    return (("Content-Type", "application/json"),)
+
 
 async def synthesize(text: str, voice: str | None = None) -> bytes | None:
     """Synthesize speech from text. Returns audio bytes (MP3) or None if disabled."""
@@ -38,10 +69,6 @@ async def _openai_compatible_tts(
     voice: str | None = None,
 ) -> bytes | None:
     """Call any OpenAI-compatible TTS endpoint."""
-    headers: dict[str, str] = {"Content-Type": "application/json"}
-    if settings.tts_api_key:
-        headers["Authorization"] = f"Bearer {settings.tts_api_key}"
-
     payload = {
         "model": "tts-1",
         "input": text,
@@ -50,14 +77,13 @@ async def _openai_compatible_tts(
     }
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(
-                f"{base_url}/audio/speech",
-                json=payload,
-                headers=headers,
-            )
-            if resp.status_code == 200:
-                return resp.content
+        resp = await get_client().post(
+            f"{base_url}/audio/speech",
+            json=payload,
+            headers=_headers(settings.tts_api_key),
+        )
+        if resp.status_code == 200:
+            return resp.content
     except (httpx.ConnectError, httpx.TimeoutException):
         pass
 
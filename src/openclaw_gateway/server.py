@@ -7,10 +7,9 @@ Or:       uvicorn openclaw_gateway.server:app --host 0.0.0.0 --port 8770
 from __future__ import annotations
 
 import asyncio
-import base64
-import json
 import logging
 import uuid
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Any
@@ -28,13 +27,30 @@ logger = logging.getLogger("openclaw")
 # Connected clients
 _clients: dict[str, WebSocket] = {}
 
-# Conversation history per session (in-memory, reset on restart)
-_conversations: dict[str, list[dict[str, str]]] = {}
-
 SYSTEM_PROMPT = (
     "You are a helpful AI assistant connected via OpenClaw Gateway. "
     "Be concise and direct in your responses."
 )
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+# Conversation history per session (in-memory, reset on restart). Each history
+# starts with SYSTEM_MESSAGE and is sent to the LLM as-is. It grows unchanged
+# (so each turn extends the previous prompt prefix) until MAX_HISTORY, then is
+# trimmed just after the first PINNED_HISTORY messages.
+_conversations: dict[str, list[dict[str, str]]] = {}
+MAX_HISTORY = 41
+PINNED_HISTORY = 3
+
+# Streamed tokens are coalesced into one chat delta per interval or size bound
+CHAT_FLUSH_INTERVAL = 0.025
+CHAT_FLUSH_SIZE = 256
+
+# TTS audio is sent in raw-byte chunks of this size (a multiple of 3, so each
+# base64 chunk decodes independently)
+AUDIO_CHUNK_SIZE = 48000
+
+# Uploads are copied to disk in pieces of this size
+UPLOAD_CHUNK_SIZE = 65536
 
 
 @asynccontextmanager
@@ -52,13 +68,15 @@ async def lifespan(app: FastAPI):
     logger.info(f"LLM: {provider_info['provider']} ({provider_info['model'] or 'none'})")
     logger.info("=" * 50)
 
-    # Start heartbeat
+    # Start message writer and heartbeat
+    storage.start_writer()
     heartbeat_task = asyncio.create_task(_heartbeat_loop())
 
     yield
 
     # Shutdown
     heartbeat_task.cancel()
+    await asyncio.gather(asr.close_client(), llm.close_client(), tts.close_client())
     await storage.close_db()
 
 
@@ -73,11 +91,11 @@ app = FastAPI(title="OpenClaw Gateway", version="0.1.0", lifespan=lifespan)
 @app.websocket("/gateway")
 async def gateway_ws(ws: WebSocket):
     await ws.accept()
-    client_id = str(uuid.uuid4())[:8]
+    client_id = uuid.uuid4().hex[:8]
     authenticated = False
 
     # Send challenge
-    await ws.send_text(protocol.make_challenge())
+    await ws.send_text(protocol.CHALLENGE_FRAME)
     logger.info(f"[{client_id}] Connected, challenge sent")
 
     try:
@@ -101,7 +119,7 @@ async def gateway_ws(ws: WebSocket):
                     if verify_token(token):
                         authenticated = True
                         _clients[client_id] = ws
-                        _conversations.setdefault(client_id, [])
+                        _conversations.setdefault(client_id, [SYSTEM_MESSAGE])
                         await ws.send_text(protocol.make_hello_ok(req_id))
                         logger.info(f"[{client_id}] Authenticated")
                     else:
@@ -120,11 +138,11 @@ async def gateway_ws(ws: WebSocket):
                         continue
 
                     message_text = params.get("message", "")
-                    if not message_text:
+                    if not message_text or not isinstance(message_text, str):
                         continue
 
                     # Ack the request
-                    run_id = str(uuid.uuid4())[:12]
+                    run_id = uuid.uuid4().hex[:12]
                     await ws.send_text(
                         protocol.make_response(
                             req_id, {"status": "accepted", "runId": run_id}
@@ -132,7 +150,7 @@ async def gateway_ws(ws: WebSocket):
                     )
 
                     # Store user message
-                    await storage.store_message(source="human", text_content=message_text)
+                    storage.store_message(source="human", text_content=message_text)
 
                     # Process in background
                     asyncio.create_task(
@@ -168,16 +186,11 @@ async def _handle_chat(ws: WebSocket, client_id: str, run_id: str, text: str):
         await ws.send_text(protocol.make_agent_lifecycle(run_id, "start"))
 
         # Build conversation
-        history = _conversations.get(client_id, [])
+        history = _conversations.get(client_id) or [SYSTEM_MESSAGE]
         history.append({"role": "user", "content": text})
 
         # Stream LLM response
-        full_response = ""
-        async for token in llm.chat_stream(history, system=SYSTEM_PROMPT):
-            full_response += token
-            await ws.send_text(
-                protocol.make_chat_event(run_id, full_response, state="delta")
-            )
+        full_response = await _stream_reply(ws, run_id, llm.chat_stream(history))
 
         # Final message
         await ws.send_text(
@@ -187,23 +200,31 @@ async def _handle_chat(ws: WebSocket, client_id: str, run_id: str, text: str):
 
         # Update conversation history
         history.append({"role": "assistant", "content": full_response})
-        # Keep last 20 turns
-        if len(history) > 40:
-            history[:] = history[-40:]
+        # Keep the system message, the first turn and the most recent ones, 20 turns in total.
+        # Once trimming starts, everything after PINNED_HISTORY shifts every turn, so only
+        # the system message and first exchange remain a stable prompt-cache prefix.
+        if len(history) > MAX_HISTORY:
+            del history[PINNED_HISTORY : len(history) - MAX_HISTORY + PINNED_HISTORY]
 
         # Store response
-        await storage.store_message(source="crab", text_content=full_response)
+        storage.store_message(source="crab", text_content=full_response)
 
         # TTS (if enabled)
         audio = await tts.synthesize(full_response)
         if audio:
-            audio_b64 = base64.b64encode(audio).decode("ascii")
+            chunks = -(-len(audio) // AUDIO_CHUNK_SIZE)
             await ws.send_text(
-                protocol.make_event(
-                    "audio_broadcast",
-                    {"audio_base64": audio_b64, "text": full_response},
+                protocol.make_audio_header(
+                    run_id, len(audio), "audio/mpeg", full_response, chunks
                 )
             )
+            for index in range(chunks):
+                start = index * AUDIO_CHUNK_SIZE
+                await ws.send_text(
+                    protocol.make_audio_chunk(
+                        run_id, index, audio[start : start + AUDIO_CHUNK_SIZE]
+                    )
+                )
 
     except WebSocketDisconnect:
         pass
@@ -224,6 +245,55 @@ async def _handle_chat(ws: WebSocket, client_id: str, run_id: str, text: str):
             pass
 
 
+async def _stream_reply(ws: WebSocket, run_id: str, tokens: AsyncIterator[str]) -> str:
+    """Forward LLM tokens as chat deltas, batching all but the first. Returns the full reply."""
+    loop = asyncio.get_running_loop()
+    parts: list[str] = []
+    buf: list[str] = []
+    buf_size = 0
+    offset = 0
+    deadline = 0.0
+    stream = tokens.__aiter__()
+    next_token: asyncio.Future[str] | None = None
+
+    try:
+        while True:
+            if next_token is None:
+                next_token = asyncio.ensure_future(stream.__anext__())
+            timeout = max(deadline - loop.time(), 0.0) if buf else None
+            done, _ = await asyncio.wait({next_token}, timeout=timeout)
+
+            if done:
+                try:
+                    token = next_token.result()
+                except StopAsyncIteration:
+                    break
+                next_token = None
+                # The first token goes out at once to keep time-to-first-token low
+                first = not parts
+                if not buf:
+                    deadline = loop.time() + CHAT_FLUSH_INTERVAL
+                buf.append(token)
+                buf_size += len(token)
+                parts.append(token)
+                if not first and buf_size < CHAT_FLUSH_SIZE and loop.time() < deadline:
+                    continue
+
+            delta = "".join(buf)
+            buf.clear()
+            buf_size = 0
+            await ws.send_text(protocol.make_chat_event(run_id, delta, offset=offset))
+            offset += len(delta)
+
+        if buf:
+            await ws.send_text(protocol.make_chat_event(run_id, "".join(buf), offset=offset))
+    finally:
+        if next_token is not None and not next_token.done():
+            next_token.cancel()
+
+    return "".join(parts)
+
+
 # ---------------------------------------------------------------------------
 # REST Endpoints
 # ---------------------------------------------------------------------------
@@ -242,8 +312,9 @@ async def get_messages(limit: int = 50):
 @app.post("/voice")
 async def voice_upload(file: UploadFile):
     """Upload voice recording for transcription."""
-    audio_data = await file.read()
-    transcription = await asr.transcribe(audio_data, filename=file.filename or "audio.wav")
+    transcription = await asr.transcribe(
+        _read_upload(file), filename=file.filename or "audio.wav", size=file.size
+    )
     if transcription:
         return {"transcription": transcription}
     return JSONResponse(
@@ -252,18 +323,31 @@ async def voice_upload(file: UploadFile):
     )
 
 
+async def _read_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    """Yield an upload in UPLOAD_CHUNK_SIZE pieces, reading off the event loop."""
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+
 @app.post("/files/upload")
 async def file_upload(file: UploadFile):
     """Upload a file (from share extension or file picker)."""
     upload_dir = Path("data/uploads")
     upload_dir.mkdir(parents=True, exist_ok=True)
 
-    filename = file.filename or f"{uuid.uuid4()}.bin"
+    filename = file.filename or f"{uuid.uuid4().hex}.bin"
     file_path = upload_dir / filename
-    content = await file.read()
-    file_path.write_bytes(content)
+    size = 0
+    # Disk writes run in the threadpool, like UploadFile's own reads
+    f = await asyncio.to_thread(file_path.open, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await asyncio.to_thread(f.write, chunk)
+            size += len(chunk)
+    finally:
+        await asyncio.to_thread(f.close)
 
-    return {"filename": filename, "size": len(content)}
+    return {"filename": filename, "size": size}
 
 
 @app.get("/health")
@@ -285,11 +369,13 @@ async def _heartbeat_loop():
     """Send periodic tick events to connected clients."""
     while True:
         await asyncio.sleep(30)
-        tick = protocol.make_tick()
-        for client_id, ws in list(_clients.items()):
-            try:
-                await ws.send_text(tick)
-            except Exception:
+        clients = list(_clients.items())
+        results = await asyncio.gather(
+            *(ws.send_text(protocol.TICK_FRAME) for _, ws in clients),
+            return_exceptions=True,
+        )
+        for (client_id, _), result in zip(clients, results):
+            if isinstance(result, Exception):
                 _clients.pop(client_id, None)
 
 
@@ -1,33 +1,60 @@
-"""SQLite message storage for history and persistence."""
+"""SQLite message storage for history and persistence.
+
+A single writer thread owns the write connection and commits queued messages
+in batches. Reads use short-lived connections, which WAL keeps from blocking
+the writer.
+"""
 
 from __future__ import annotations
 
-import json
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+import time
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-import aiosqlite
+import orjson
 
 from .config import settings
 
-_db: aiosqlite.Connection | None = None
+logger = logging.getLogger("openclaw")
+
+# Queued inserts are committed in batches by the writer thread
+FLUSH_INTERVAL = 0.05
+FLUSH_BATCH = 64
+
+# Longest a read waits for earlier queued messages to be committed
+READ_FLUSH_TIMEOUT = 1.0
+
+_INSERT_SQL = """INSERT INTO messages
+    (id, created_at, source, type, priority, text_content, audio_url, image_url, file_url, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
 
+# Rows to insert; an Event asks the writer to commit now and set it, None asks
+# the writer to stop
+_queue: queue.Queue[tuple[Any, ...] | threading.Event | None] = queue.Queue()
+_writer: threading.Thread | None = None
+_schema_ready = False
+_closed = False
 
-async def get_db() -> aiosqlite.Connection:
-    global _db
-    if _db is None:
-        db_path = Path(settings.db_path)
-        db_path.parent.mkdir(parents=True, exist_ok=True)
-        _db = await aiosqlite.connect(str(db_path))
-        _db.row_factory = aiosqlite.Row
-        await _init_tables(_db)
-    return _db
 
+def _connect(**kwargs: Any) -> sqlite3.Connection:
+    db_path = Path(settings.db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    return sqlite3.connect(str(db_path), **kwargs)
 
-async def _init_tables(db: aiosqlite.Connection) -> None:
-    await db.execute("""
+
+def _init_tables(db: sqlite3.Connection) -> None:
+    global _schema_ready
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("PRAGMA temp_store=MEMORY")
+    db.execute("""
         CREATE TABLE IF NOT EXISTS messages (
             id TEXT PRIMARY KEY,
             created_at TEXT NOT NULL,
@@ -41,10 +68,72 @@ async def _init_tables(db: aiosqlite.Connection) -> None:
             metadata TEXT
         )
     """)
-    await db.commit()
-
-
-async def store_message(
+    db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at DESC)"
+    )
+    db.commit()
+    _schema_ready = True
+
+
+def start_writer() -> None:
+    """Create the schema and start the thread that commits queued messages."""
+    global _writer, _closed
+    _closed = False
+    db = _connect(check_same_thread=False)
+    _init_tables(db)
+    _writer = threading.Thread(
+        target=_writer_loop, args=(db,), name="openclaw-storage", daemon=True
+    )
+    _writer.start()
+
+
+def _writer_loop(db: sqlite3.Connection) -> None:
+    stop = False
+    while not stop:
+        # Block for the first item, then gather more until the batch is full,
+        # FLUSH_INTERVAL has passed, or a flush or stop marker arrives
+        items = [_queue.get()]
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while isinstance(items[-1], tuple) and len(items) < FLUSH_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                items.append(_queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        rows = [item for item in items if isinstance(item, tuple)]
+        stop = items[-1] is None
+        try:
+            if rows:
+                _write_rows(db, rows)
+        finally:
+            if isinstance(items[-1], threading.Event):
+                items[-1].set()
+    db.close()
+
+
+def _write_rows(db: sqlite3.Connection, rows: list[tuple[Any, ...]]) -> None:
+    """Insert a batch in one transaction, falling back to per-row inserts on error."""
+    try:
+        db.executemany(_INSERT_SQL, rows)
+        db.commit()
+        return
+    except sqlite3.Error:
+        db.rollback()
+
+    # Retry one at a time so a bad row only loses itself
+    for row in rows:
+        try:
+            db.execute(_INSERT_SQL, row)
+            db.commit()
+        except sqlite3.Error as e:
+            db.rollback()
+            logger.error(f"Dropping message {row[0]}: {e}")
+
+
+def store_message(
     source: str,
     type: str = "text",
     priority: str = "normal",
@@ -54,28 +143,30 @@ async def store_message(
     file_url: str | None = None,
     metadata: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
-    db = await get_db()
-    msg_id = str(uuid.uuid4())
+    """Queue a message for the writer thread and return it immediately.
+
+    Messages stored after close_db() are logged and dropped.
+    """
+    msg_id = uuid.uuid4().hex
     now = datetime.now(timezone.utc).isoformat()
 
-    await db.execute(
-        """INSERT INTO messages
-           (id, created_at, source, type, priority, text_content, audio_url, image_url, file_url, metadata)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            msg_id,
-            now,
-            source,
-            type,
-            priority,
-            text_content,
-            audio_url,
-            image_url,
-            file_url,
-            json.dumps(metadata) if metadata else None,
-        ),
-    )
-    await db.commit()
+    if _closed:
+        logger.warning(f"Storage is closed, dropping {source} message {msg_id}")
+    else:
+        _queue.put_nowait(
+            (
+                msg_id,
+                now,
+                source,
+                type,
+                priority,
+                text_content,
+                audio_url,
+                image_url,
+                file_url,
+                orjson.dumps(metadata).decode() if metadata else None,
+            )
+        )
 
     return {
         "id": msg_id,
@@ -90,17 +181,44 @@ async def store_message(
     }
 
 
+def _read_messages(limit: int) -> list[dict[str, Any]]:
+    # Let the writer commit what is already queued so the read sees it. The
+    # wait is bounded; under a stuck writer the read may miss recent messages.
+    if _writer is not None and _writer.is_alive():
+        flushed = threading.Event()
+        _queue.put(flushed)
+        flushed.wait(READ_FLUSH_TIMEOUT)
+
+    db = _connect()
+    db.row_factory = sqlite3.Row
+    try:
+        # No writer has created the schema yet
+        if not _schema_ready:
+            _init_tables(db)
+        rows = db.execute(
+            "SELECT * FROM messages ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+    finally:
+        db.close()
+
+    messages = []
+    for row in reversed(rows):
+        message = dict(row)
+        if message["metadata"]:
+            message["metadata"] = orjson.loads(message["metadata"])
+        messages.append(message)
+    return messages
+
+
 async def get_messages(limit: int = 50) -> list[dict[str, Any]]:
-    db = await get_db()
-    cursor = await db.execute(
-        "SELECT * FROM messages ORDER BY created_at DESC LIMIT ?", (limit,)
-    )
-    rows = await cursor.fetchall()
-    return [dict(row) for row in reversed(rows)]
+    return await asyncio.to_thread(_read_messages, limit)
 
 
 async def close_db() -> None:
-    global _db
-    if _db is not None:
-        await _db.close()
-        _db = None
+    """Commit any queued messages and stop the writer thread."""
+    global _writer, _closed
+    _closed = True
+    if _writer is not None:
+        _queue.put(None)
+        await asyncio.to_thread(_writer.join)
+        _writer = None